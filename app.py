@@ -1,9 +1,13 @@
 import uuid
 import os
-from fastapi import FastAPI, HTTPException, status
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Response, status
 from pydantic import BaseModel
 import chromadb
+from chromadb.errors import InvalidArgumentError
 from ollama import Client
+from chroma_client import create_http_client, is_db_connection_error, with_retry
 
 app = FastAPI(
     title="Nextwork RAG API",
@@ -17,15 +21,55 @@ CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "docs")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "tinyllama")
 OLLAMA_HOST_RAW = os.getenv("OLLAMA_HOST", "localhost:11434")
 
+# Remote ChromaDB configuration (used when CHROMA_MODE=http)
+CHROMA_MODE = os.getenv("CHROMA_MODE", "persistent").lower()  # "persistent" or "http"
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_READ_HOST = os.getenv("CHROMA_READ_HOST", "")  # Optional read replica for queries
+CHROMA_READ_PORT = int(os.getenv("CHROMA_READ_PORT", str(CHROMA_PORT)))
+# SSL, timeout, connection pool, and retry settings are read in chroma_client.py
+
+# Bulk delete configuration
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))  # Max ids per get/delete call
+DELETE_BATCH_PAUSE = float(os.getenv("DELETE_BATCH_PAUSE", "0.05"))  # Seconds between batches in background mode
+DELETE_JOB_TTL = float(os.getenv("DELETE_JOB_TTL", "3600"))  # Seconds to keep finished background jobs
+
+
 # Initialize ChromaDB client and collection
-try:
-    chroma = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    collection = chroma.get_or_create_collection(CHROMA_COLLECTION_NAME)
-except Exception as e:
-    raise RuntimeError(
-        f"Failed to initialize ChromaDB at path '{CHROMA_DB_PATH}': {str(e)}. "
-        f"Ensure the directory exists and is writable."
-    )
+# `collection` receives writes (/add, /delete); `read_collection` serves /query
+if CHROMA_MODE == "http":
+    CHROMA_LOCATION = f"the Chroma server at '{CHROMA_HOST}:{CHROMA_PORT}' is reachable"
+    try:
+        chroma = create_http_client(CHROMA_HOST, CHROMA_PORT)
+        collection = with_retry(chroma.get_or_create_collection, CHROMA_COLLECTION_NAME)
+    except Exception as e:
+        raise RuntimeError(
+            f"Failed to connect to ChromaDB server at '{CHROMA_HOST}:{CHROMA_PORT}': {str(e)}. "
+            f"Ensure the Chroma server is running and reachable."
+        )
+    read_collection = collection
+    if CHROMA_READ_HOST:
+        try:
+            read_chroma = create_http_client(CHROMA_READ_HOST, CHROMA_READ_PORT)
+            read_collection = with_retry(read_chroma.get_collection, CHROMA_COLLECTION_NAME)
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to connect to ChromaDB read replica at '{CHROMA_READ_HOST}:{CHROMA_READ_PORT}': {str(e)}. "
+                f"Ensure the read replica is running, reachable, and has the '{CHROMA_COLLECTION_NAME}' collection."
+            )
+elif CHROMA_MODE == "persistent":
+    CHROMA_LOCATION = f"the database path '{CHROMA_DB_PATH}' is correct"
+    try:
+        chroma = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+        collection = chroma.get_or_create_collection(CHROMA_COLLECTION_NAME)
+        read_collection = collection
+    except Exception as e:
+        raise RuntimeError(
+            f"Failed to initialize ChromaDB at path '{CHROMA_DB_PATH}': {str(e)}. "
+            f"Ensure the directory exists and is writable."
+        )
+else:
+    raise RuntimeError(f"Invalid CHROMA_MODE '{CHROMA_MODE}'. Use 'persistent' or 'http'.")
 
 # Initialize Ollama client
 # Parse OLLAMA_HOST - client expects hostname:port format, not URL
@@ -53,6 +97,92 @@ class AddRequest(BaseModel):
     text: str
 
 
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[str]] = None  # Document IDs to delete
+    where: Optional[Dict[str, Any]] = None  # Metadata filter, e.g. {"source": "docs-1a2b3c4d/guide.md"}
+    background: bool = False  # If True, run as a background job and return a job ID immediately
+
+
+# Background bulk delete jobs, keyed by job ID
+# Jobs live in this process's memory: with several replicas, a job is only visible
+# on the pod that started it. Finished jobs are dropped after DELETE_JOB_TTL seconds.
+delete_jobs: Dict[str, Dict[str, Any]] = {}
+
+
+def prune_delete_jobs():
+    """Drop finished bulk delete jobs older than DELETE_JOB_TTL."""
+    cutoff = time.time() - DELETE_JOB_TTL
+    for job_id, job in list(delete_jobs.items()):
+        if job.get("finished_at") is not None and job["finished_at"] < cutoff:
+            delete_jobs.pop(job_id, None)
+
+
+def run_bulk_delete(ids: Optional[List[str]], where: Optional[Dict[str, Any]],
+                    job: Optional[Dict[str, Any]] = None, pause: float = 0.0):
+    """
+    Delete documents by ID and/or metadata filter in batches.
+
+    With `ids`, existence is checked with one ID-only lookup per batch, so missing
+    IDs are counted without fetching documents or embeddings; if `where` is also
+    given, existing IDs that don't match it are skipped. With only `where`,
+    matching IDs are fetched and deleted DELETE_BATCH_SIZE at a time until none
+    are left. When a job dict is given, its progress fields are updated after
+    every batch.
+
+    Returns:
+        Tuple of (deleted count, missing count, skipped count)
+    """
+    deleted = missing = skipped = 0
+
+    def delete_batch(batch):
+        nonlocal deleted
+        with_retry(collection.delete, ids=batch)
+        deleted += len(batch)
+        if job is not None:
+            job["deleted"] = deleted
+        if pause:
+            # Yield between batches so large purges don't starve query traffic
+            time.sleep(pause)
+
+    if ids is not None:
+        unique_ids = list(dict.fromkeys(ids))
+        if job is not None:
+            job.update(status="running", total=len(unique_ids))
+        for start in range(0, len(unique_ids), DELETE_BATCH_SIZE):
+            batch = unique_ids[start:start + DELETE_BATCH_SIZE]
+            existing_ids = with_retry(collection.get, ids=batch, include=[])["ids"]
+            missing += len(batch) - len(existing_ids)
+            if where is not None and existing_ids:
+                matching_ids = with_retry(collection.get, ids=existing_ids, where=where, include=[])["ids"]
+                skipped += len(existing_ids) - len(matching_ids)
+                existing_ids = matching_ids
+            if job is not None:
+                job.update(missing=missing, skipped=skipped)
+            if existing_ids:
+                delete_batch(existing_ids)
+    else:
+        if job is not None:
+            job["status"] = "running"
+        while True:
+            batch = with_retry(collection.get, where=where, limit=DELETE_BATCH_SIZE, include=[])["ids"]
+            if not batch:
+                break
+            delete_batch(batch)
+    return deleted, missing, skipped
+
+
+def run_bulk_delete_job(job_id: str, ids: Optional[List[str]], where: Optional[Dict[str, Any]]):
+    """Run a bulk delete as a background job, recording the outcome in delete_jobs."""
+    job = delete_jobs[job_id]
+    try:
+        run_bulk_delete(ids, where, job=job, pause=DELETE_BATCH_PAUSE)
+        job["status"] = "completed"
+    except Exception as e:
+        job.update(status="failed", error=str(e))
+    finally:
+        job["finished_at"] = time.time()
+
+
 @app.get("/")
 def root():
     """Health check endpoint."""
@@ -73,7 +203,8 @@ def add_knowledge(request: AddRequest):
         doc_id = str(uuid.uuid4())
         
         # Add the text to Chroma collection
-        collection.add(documents=[request.text], ids=[doc_id])
+        # upsert keeps a retried write idempotent if the first attempt reached the server
+        with_retry(collection.upsert, documents=[request.text], ids=[doc_id])
         
         return {
             "status": "success",
@@ -87,10 +218,10 @@ def add_knowledge(request: AddRequest):
         )
     except Exception as e:
         error_msg = str(e)
-        if "connection" in error_msg.lower() or "network" in error_msg.lower():
+        if is_db_connection_error(e):
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Database connection error: {error_msg}. Check if ChromaDB is accessible and the database path '{CHROMA_DB_PATH}' is correct."
+                detail=f"Database connection error: {error_msg}. Check if ChromaDB is accessible and {CHROMA_LOCATION}."
             )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -125,7 +256,8 @@ def query(request: QueryRequest):
     
     try:
         # Query ChromaDB for relevant context
-        results = collection.query(
+        results = with_retry(
+            read_collection.query,
             query_texts=[request.q],
             n_results=request.n_results,
             include=["documents", "distances", "metadatas"]
@@ -138,7 +270,8 @@ def query(request: QueryRequest):
         ids = results.get("ids", [])
         
         if not documents or len(documents) == 0 or len(documents[0]) == 0:
-            doc_count = collection.count()
+            # Count on the primary, since a read replica may lag behind it
+            doc_count = with_retry(collection.count)
             if doc_count == 0:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -214,7 +347,7 @@ def query(request: QueryRequest):
         raise
     except Exception as e:
         error_msg = str(e)
-        if "connection" in error_msg.lower() or "network" in error_msg.lower():
+        if is_db_connection_error(e):
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Database connection error: {error_msg}. Check if ChromaDB is accessible."
@@ -237,7 +370,7 @@ def delete_document(doc_id: str):
     try:
         # Check if document exists
         try:
-            results = collection.get(ids=[doc_id])
+            results = with_retry(collection.get, ids=[doc_id], include=[])
             if not results["ids"] or len(results["ids"]) == 0:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -250,7 +383,7 @@ def delete_document(doc_id: str):
             pass
         
         # Delete the document
-        collection.delete(ids=[doc_id])
+        with_retry(collection.delete, ids=[doc_id])
         
         return {
             "status": "success",
@@ -261,7 +394,7 @@ def delete_document(doc_id: str):
         raise
     except Exception as e:
         error_msg = str(e)
-        if "connection" in error_msg.lower() or "network" in error_msg.lower():
+        if is_db_connection_error(e):
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Database connection error: {error_msg}. Check if ChromaDB is accessible."
@@ -270,3 +403,101 @@ def delete_document(doc_id: str):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete document: {error_msg}"
         )
+
+
+@app.post("/delete/bulk", status_code=status.HTTP_200_OK)
+def bulk_delete_documents(request: BulkDeleteRequest, response: Response, background_tasks: BackgroundTasks):
+    """
+    Delete many documents by a list of IDs and/or a metadata `where` filter.
+
+    Set `background` to true for very large purges; the request then returns
+    202 with a job ID whose progress can be read from /delete/jobs/{job_id}.
+    """
+    where = request.where or None
+    if request.ids is None and where is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a list of 'ids' and/or a non-empty metadata 'where' filter."
+        )
+    ids = request.ids
+    if ids is not None:
+        if not ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'ids' cannot be empty. Provide at least one document ID."
+            )
+        blank = [index for index, doc_id in enumerate(ids) if not doc_id or not doc_id.strip()]
+        if blank:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Document IDs cannot be empty. Found {len(blank)} empty ID(s) at position(s) {blank[:10]}."
+            )
+
+    try:
+        if where is not None:
+            # Validate the filter up front so a malformed one is a 400, not a failed job
+            with_retry(collection.get, where=where, limit=1, include=[])
+
+        if request.background:
+            prune_delete_jobs()
+            job_id = str(uuid.uuid4())
+            delete_jobs[job_id] = {
+                "id": job_id,
+                "status": "pending",
+                "total": None,
+                "deleted": 0,
+                "missing": 0,
+                "skipped": 0,
+                "finished_at": None,
+            }
+            background_tasks.add_task(run_bulk_delete_job, job_id, ids, where)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {
+                "status": "accepted",
+                "message": "Bulk delete started in the background",
+                "job_id": job_id,
+                "status_url": f"/delete/jobs/{job_id}"
+            }
+
+        deleted, missing, skipped = run_bulk_delete(ids, where)
+        return {
+            "status": "success",
+            "message": f"Deleted {deleted} document(s), {missing} not found, {skipped} skipped by filter",
+            "deleted": deleted,
+            "missing": missing,
+            "skipped": skipped
+        }
+    except (ValueError, InvalidArgumentError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid delete request: {str(e)}"
+        )
+    except Exception as e:
+        error_msg = str(e)
+        if is_db_connection_error(e):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Database connection error: {error_msg}. Check if ChromaDB is accessible."
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete documents: {error_msg}"
+        )
+
+
+@app.get("/delete/jobs/{job_id}")
+def get_delete_job(job_id: str):
+    """Get the progress of a background bulk delete job."""
+    prune_delete_jobs()
+    job = delete_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=(
+                f"Delete job '{job_id}' not found. Jobs are kept in the memory of the API instance that "
+                f"started them: they are lost on restart, expire {int(DELETE_JOB_TTL)}s after finishing, "
+                f"and with multiple replicas are only visible on the replica that accepted the request."
+            )
+        )
+    # Return a snapshot; the background task keeps updating the job dict
+    return dict(job)
@@ -0,0 +1,76 @@
+"""Pooled ChromaDB HTTP client with timeouts and retries for remote Chroma mode."""
+import os
+import time
+import chromadb
+import httpx
+
+# Configuration from environment variables
+CHROMA_SSL = os.getenv("CHROMA_SSL", "false").lower() == "true"
+CHROMA_TIMEOUT = float(os.getenv("CHROMA_TIMEOUT", "10"))  # Seconds per request
+CHROMA_MAX_CONNECTIONS = int(os.getenv("CHROMA_MAX_CONNECTIONS", "20"))
+CHROMA_KEEPALIVE_SECS = float(os.getenv("CHROMA_KEEPALIVE_SECS", "60"))
+CHROMA_MAX_RETRIES = int(os.getenv("CHROMA_MAX_RETRIES", "3"))
+CHROMA_RETRY_BACKOFF = float(os.getenv("CHROMA_RETRY_BACKOFF", "0.5"))  # Seconds, doubled per retry
+
+
+def create_http_client(host: str, port: int):
+    """
+    Create a ChromaDB HTTP client with a pooled keep-alive session and timeouts.
+
+    chromadb builds its httpx session with no timeout and no pool limits, has no
+    settings for either, and only accepts its own API classes in Settings, so the
+    session is rebuilt after the client is created. A timed heartbeat runs first
+    so the client constructor's own requests never hang on an unreachable server.
+    """
+    scheme = "https" if CHROMA_SSL else "http"
+    with_retry(
+        httpx.get,
+        f"{scheme}://{host}:{port}/api/v2/heartbeat",
+        timeout=CHROMA_TIMEOUT,
+    ).raise_for_status()
+
+    client = chromadb.HttpClient(host=host, port=port, ssl=CHROMA_SSL)
+    server = getattr(client, "_server", None)
+    session = getattr(server, "_session", None)
+    if not isinstance(session, httpx.Client):
+        raise RuntimeError(
+            f"Unsupported chromadb version {chromadb.__version__}: HTTP session not found, "
+            f"cannot apply connection pool and timeout settings."
+        )
+    verify = server._settings.chroma_server_ssl_verify
+    server._session = httpx.Client(
+        timeout=httpx.Timeout(CHROMA_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=CHROMA_MAX_CONNECTIONS,
+            max_keepalive_connections=CHROMA_MAX_CONNECTIONS,
+            keepalive_expiry=CHROMA_KEEPALIVE_SECS,
+        ),
+        verify=True if verify is None else verify,
+        headers=session.headers,
+    )
+    session.close()
+    return client
+
+
+def with_retry(operation, *args, **kwargs):
+    """
+    Call a ChromaDB operation, retrying transport errors with exponential backoff.
+
+    Only connection failures and timeouts are retried; errors returned by the
+    server are raised immediately.
+    """
+    for attempt in range(CHROMA_MAX_RETRIES + 1):
+        try:
+            return operation(*args, **kwargs)
+        except httpx.TransportError:
+            if attempt == CHROMA_MAX_RETRIES:
+                raise
+            time.sleep(CHROMA_RETRY_BACKOFF * (2 ** attempt))
+
+
+def is_db_connection_error(error: Exception) -> bool:
+    """Return True if the error means ChromaDB could not be reached."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    error_msg = str(error).lower()
+    return "connection" in error_msg or "network" in error_msg
@@ -1,7 +1,41 @@
 """Script to embed documents into ChromaDB for the RAG API."""
 import chromadb
+import argparse
+import hashlib
+import json
 import os
 import sys
+import time
+from chroma_client import create_http_client, with_retry
+
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./db")
+CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "docs")
+CHROMA_MODE = os.getenv("CHROMA_MODE", "persistent").lower()  # "persistent" or "http"
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+
+MANIFEST_VERSION = 2
+DEFAULT_EXTENSIONS = (".txt", ".md")
+CHUNK_SIZE = 1000  # Target maximum characters per chunk
+MIN_CHUNK_SIZE = 100  # Paragraphs shorter than this (headings, lead-ins) are merged into the next one
+BATCH_SIZE = 500  # Max ids per collection.upsert / collection.delete call
+
+
+def get_collection():
+    """
+    Open the collection configured by the environment, like app.py does.
+
+    With CHROMA_MODE=http, documents are written to the Chroma server at
+    CHROMA_HOST:CHROMA_PORT; sync manifests still live under CHROMA_DB_PATH
+    on local disk.
+    """
+    if CHROMA_MODE == "http":
+        client = create_http_client(CHROMA_HOST, CHROMA_PORT)
+        return with_retry(client.get_or_create_collection, CHROMA_COLLECTION_NAME)
+    if CHROMA_MODE == "persistent":
+        client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+        return client.get_or_create_collection(CHROMA_COLLECTION_NAME)
+    raise ValueError(f"Invalid CHROMA_MODE '{CHROMA_MODE}'. Use 'persistent' or 'http'.")
 
 
 def embed_file(file_path: str, doc_id: str = None):
@@ -16,8 +50,7 @@ def embed_file(file_path: str, doc_id: str = None):
         raise FileNotFoundError(f"File not found: {file_path}")
     
     # Create client and collection
-    client = chromadb.PersistentClient(path="./db")
-    collection = client.get_or_create_collection("docs")
+    collection = get_collection()
     
     # Read the text file
     with open(file_path, "r", encoding="utf-8") as f:
@@ -32,18 +65,362 @@ def embed_file(file_path: str, doc_id: str = None):
     
     # Add document to collection
     # ChromaDB will automatically generate embeddings using the default embedding function
-    collection.add(documents=[text], ids=[doc_id])
+    # upsert so re-seeding a Chroma server (e.g. a rerun k8s Job) is safe
+    with_retry(collection.upsert, documents=[text], ids=[doc_id])
     
     print(f"✓ Successfully embedded '{file_path}' with ID '{doc_id}' into ChromaDB")
     return doc_id
 
 
+def _split_long(text: str, chunk_size: int):
+    """Split text longer than chunk_size on line breaks, cutting overlong lines."""
+    if len(text) <= chunk_size:
+        return [text]
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:chunk_size])
+            line = line[chunk_size:]
+        if current and len(current) + len(line) + 1 > chunk_size:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, min_chunk_size: int = MIN_CHUNK_SIZE):
+    """
+    Split text into chunks on paragraph boundaries.
+
+    Each paragraph of at least min_chunk_size characters ends a chunk, and
+    shorter paragraphs such as Markdown headings are merged into the paragraph
+    that follows them. Whether a boundary falls after a paragraph depends only
+    on that paragraph, so an edit only changes the chunks around it. Chunks
+    longer than chunk_size are split on line breaks.
+    """
+    chunks = []
+    pending = ""
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) < min_chunk_size:
+            # Keep a run of short paragraphs from growing past chunk_size
+            if pending and len(pending) + len(paragraph) + 2 > chunk_size:
+                chunks.extend(_split_long(pending, chunk_size))
+                pending = ""
+            pending = f"{pending}\n\n{paragraph}" if pending else paragraph
+            continue
+        pending = f"{pending}\n\n{paragraph}" if pending else paragraph
+        chunks.extend(_split_long(pending, chunk_size))
+        pending = ""
+    if pending:
+        chunks.extend(_split_long(pending, chunk_size))
+    return chunks
+
+
+def chunk_ids_for(source: str, chunks):
+    """
+    Build content-addressed chunk IDs for a source file.
+
+    IDs are derived from the chunk text, so unchanged chunks keep their ID
+    across edits and are never re-embedded.
+    """
+    ids = []
+    seen = {}
+    for chunk in chunks:
+        digest = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        ids.append(f"{source}::{digest}" if count == 0 else f"{source}::{digest}-{count}")
+    return ids
+
+
+def root_id(root: str):
+    """
+    Identify a synced directory by its name and a hash of its absolute path.
+
+    Used to namespace manifests, chunk IDs, and `source` metadata, so syncing
+    several directories into one collection never mixes up their files.
+    """
+    abs_root = os.path.abspath(root)
+    digest = hashlib.sha1(abs_root.encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.basename(abs_root.rstrip(os.sep)) or 'root'}-{digest}"
+
+
+def _batched(items, size: int = BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Manifest:
+    """
+    Record of the files embedded from one directory, stored alongside the ChromaDB database.
+
+    Each entry maps a path (relative to the synced directory) to its mtime,
+    size, content hash, and the chunk IDs stored in the collection.
+    """
+
+    def __init__(self, path: str, root: str):
+        self.path = path
+        self.root = os.path.abspath(root)
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(
+                    f"Unsupported manifest version in {path}: {data.get('version')}. "
+                    f"Delete the manifest and the collection to re-embed from scratch."
+                )
+            if data.get("root") != self.root:
+                raise ValueError(
+                    f"Manifest {path} belongs to '{data.get('root')}', not '{self.root}'."
+                )
+            self.files = data.get("files", {})
+
+    @classmethod
+    def for_root(cls, db_path: str, collection_name: str, root: str):
+        """Load the manifest for one directory synced into one collection."""
+        return cls(os.path.join(db_path, f"embed_manifest_{collection_name}_{root_id(root)}.json"), root)
+
+    def save(self):
+        """Write the manifest atomically so an interrupted sync never corrupts it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "root": self.root, "files": self.files},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def scan_directory(root: str, extensions=DEFAULT_EXTENSIONS):
+    """
+    Stat every matching file under root without reading it.
+
+    Returns:
+        Dict mapping relative path to (mtime_ns, size)
+    """
+    snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip hidden directories such as .git
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for filename in filenames:
+            if not filename.lower().endswith(tuple(extensions)):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
+                # File removed between listing and stat
+                continue
+            rel_path = os.path.relpath(full_path, root).replace(os.sep, "/")
+            snapshot[rel_path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def sync_directory(root: str, collection, manifest: Manifest, extensions=DEFAULT_EXTENSIONS,
+                   snapshot=None):
+    """
+    Bring the collection in line with the files under root.
+
+    Only files whose mtime or size changed are read and hashed, and only chunks
+    whose content changed are embedded, so the cost is proportional to the change
+    rather than to the size of the directory. Chunks are stored with `source`
+    metadata of "<root id>/<relative path>". Writes are flushed in batches of
+    about BATCH_SIZE chunks, and the manifest is saved after each batch, so an
+    interrupted sync resumes from the last batch instead of starting over.
+
+    Returns:
+        Dict with counts of added, changed, removed, and unchanged files and of
+        chunks embedded and deleted
+    """
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Directory not found: {root}")
+    if os.path.abspath(root) != manifest.root:
+        raise ValueError(f"Manifest {manifest.path} belongs to '{manifest.root}', not '{os.path.abspath(root)}'.")
+    if snapshot is None:
+        snapshot = scan_directory(root, extensions)
+
+    prefix = root_id(root)
+    stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0,
+             "chunks_embedded": 0, "chunks_deleted": 0}
+    ids_to_delete = []
+    upserts = []  # (chunk id, document, metadata)
+    updated_entries = {}
+    removed_paths = []
+
+    def flush():
+        # Write the pending batch, then record it in the manifest, so a failure
+        # later in the sync never loses the files already written
+        for batch in _batched(ids_to_delete):
+            with_retry(collection.delete, ids=batch)
+        for batch in _batched(upserts):
+            with_retry(
+                collection.upsert,
+                ids=[u[0] for u in batch],
+                documents=[u[1] for u in batch],
+                metadatas=[u[2] for u in batch],
+            )
+        stats["chunks_deleted"] += len(ids_to_delete)
+        stats["chunks_embedded"] += len(upserts)
+        manifest.files.update(updated_entries)
+        for rel_path in removed_paths:
+            del manifest.files[rel_path]
+        manifest.save()
+        ids_to_delete.clear()
+        upserts.clear()
+        updated_entries.clear()
+        removed_paths.clear()
+
+    for rel_path in [p for p in manifest.files if p not in snapshot]:
+        ids_to_delete.extend(manifest.files[rel_path]["chunk_ids"])
+        removed_paths.append(rel_path)
+        stats["removed"] += 1
+        if len(ids_to_delete) >= BATCH_SIZE:
+            flush()
+
+    for rel_path, (mtime_ns, size) in snapshot.items():
+        entry = manifest.files.get(rel_path)
+        if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+            stats["unchanged"] += 1
+            continue
+
+        try:
+            with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+                text = f.read()
+        except (FileNotFoundError, UnicodeDecodeError) as e:
+            print(f"⚠ Skipping '{rel_path}': {e}", file=sys.stderr)
+            continue
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        if entry and entry["hash"] == content_hash:
+            # Touched but not modified; refresh the stat info only
+            updated_entries[rel_path] = dict(entry, mtime_ns=mtime_ns, size=size)
+            stats["unchanged"] += 1
+            continue
+
+        source = f"{prefix}/{rel_path}"
+        chunks = chunk_text(text)
+        new_ids = chunk_ids_for(source, chunks)
+        old_ids = set(entry["chunk_ids"]) if entry else set()
+        for chunk_id, chunk in zip(new_ids, chunks):
+            if chunk_id not in old_ids:
+                upserts.append((chunk_id, chunk, {"source": source, "root": manifest.root}))
+        new_id_set = set(new_ids)
+        ids_to_delete.extend(i for i in old_ids if i not in new_id_set)
+
+        stats["changed" if entry else "added"] += 1
+        updated_entries[rel_path] = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "hash": content_hash,
+            "chunk_ids": new_ids,
+        }
+        if len(upserts) >= BATCH_SIZE or len(ids_to_delete) >= BATCH_SIZE:
+            flush()
+
+    flush()
+    return stats
+
+
+def _print_stats(root: str, stats):
+    print(
+        f"✓ Synced '{root}': {stats['added']} added, {stats['changed']} changed, "
+        f"{stats['removed']} removed, {stats['unchanged']} unchanged "
+        f"({stats['chunks_embedded']} chunks embedded, {stats['chunks_deleted']} chunks deleted)"
+    )
+
+
+def watch_directory(root: str, collection, manifest: Manifest, extensions=DEFAULT_EXTENSIONS,
+                    interval: float = 2.0, debounce: float = 1.0):
+    """
+    Poll root for changes and re-sync once the tree has settled.
+
+    Each poll only stats files. A sync runs after changes are detected and the
+    tree has stayed unchanged for `debounce` seconds, so a burst of edits
+    results in a single sync.
+    """
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Directory not found: {root}")
+    print(f"Watching '{root}' for changes (Ctrl+C to stop)...")
+    last_synced = None  # Nothing synced yet, so the first poll always syncs
+
+    while True:
+        snapshot = scan_directory(root, extensions)
+        if snapshot == last_synced:
+            time.sleep(interval)
+            continue
+
+        if last_synced is not None:
+            # Wait for the tree to stop changing before syncing
+            while True:
+                time.sleep(debounce)
+                settled = scan_directory(root, extensions)
+                if settled == snapshot:
+                    break
+                snapshot = settled
+
+        try:
+            _print_stats(root, sync_directory(root, collection, manifest, extensions, snapshot=snapshot))
+            last_synced = snapshot
+        except Exception as e:
+            # Leave last_synced alone so the next poll retries the sync
+            print(f"✗ Sync failed, retrying in {interval}s: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def _positive_float(value: str):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Embed documents into ChromaDB for the RAG API.")
+    parser.add_argument("path", nargs="?", default="k8s.txt",
+                        help="File to embed, or directory to use with --sync/--watch (default: k8s.txt)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sync", action="store_true",
+                      help="Incrementally sync a directory: embed added/changed files, remove deleted ones")
+    mode.add_argument("--watch", action="store_true",
+                      help="Sync a directory, then keep polling it and re-sync on changes")
+    parser.add_argument("--interval", type=_positive_float, default=2.0,
+                        help="Seconds between polls in --watch mode (default: 2.0)")
+    parser.add_argument("--debounce", type=_positive_float, default=1.0,
+                        help="Seconds the tree must be unchanged before re-syncing (default: 1.0)")
+    parser.add_argument("--ext", action="append", dest="extensions",
+                        help="File extension to include in --sync/--watch (repeatable, default: .txt and .md)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    # Default to k8s.txt if no argument provided
-    file_path = sys.argv[1] if len(sys.argv) > 1 else "k8s.txt"
-    
+    args = _parse_args(sys.argv[1:])
+
     try:
-        embed_file(file_path)
+        if args.sync or args.watch:
+            extensions = DEFAULT_EXTENSIONS
+            if args.extensions:
+                extensions = tuple("." + e.lower().lstrip(".") for e in args.extensions)
+            collection = get_collection()
+            manifest = Manifest.for_root(CHROMA_DB_PATH, CHROMA_COLLECTION_NAME, args.path)
+            if args.watch:
+                watch_directory(args.path, collection, manifest, extensions,
+                                interval=args.interval, debounce=args.debounce)
+            else:
+                _print_stats(args.path, sync_directory(args.path, collection, manifest, extensions))
+        else:
+            embed_file(args.path)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for bulk delete in app.py, using an in-memory ChromaDB collection."""
+import os
+import sys
+import tempfile
+import uuid
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Keep the module-level persistent client out of the working directory
+os.environ.setdefault("CHROMA_DB_PATH", tempfile.mkdtemp())
+
+import chromadb
+from fastapi.testclient import TestClient
+
+import app
+
+
+class RecordingCollection:
+    """Wraps a collection and records the size of every delete call."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.delete_batches = []
+
+    def get(self, **kwargs):
+        return self.collection.get(**kwargs)
+
+    def delete(self, ids):
+        self.delete_batches.append(len(ids))
+        self.collection.delete(ids=ids)
+
+
+def setup_collection(docs):
+    """Swap app.collection for a fresh in-memory collection holding {id: source}."""
+    collection = chromadb.EphemeralClient().create_collection(f"bulk-{uuid.uuid4().hex[:8]}")
+    collection.add(
+        ids=list(docs),
+        embeddings=[[float(i), 1.0] for i in range(len(docs))],
+        metadatas=[{"source": source} for source in docs.values()],
+    )
+    app.collection = RecordingCollection(collection)
+    return app.collection
+
+
+def remaining(collection):
+    return sorted(collection.get(include=[])["ids"])
+
+
+def test_ids_counts_missing_and_deduplicates():
+    collection = setup_collection({"a": "x.md", "b": "x.md", "c": "y.md"})
+    deleted, missing, skipped = app.run_bulk_delete(["a", "b", "a", "nope"], None)
+    assert (deleted, missing, skipped) == (2, 1, 0)
+    assert remaining(collection) == ["c"]
+
+
+def test_ids_with_where_skips_non_matching():
+    collection = setup_collection({"a": "x.md", "b": "y.md", "c": "x.md"})
+    deleted, missing, skipped = app.run_bulk_delete(["a", "b", "nope"], {"source": "x.md"})
+    assert (deleted, missing, skipped) == (1, 1, 1)
+    assert remaining(collection) == ["b", "c"]
+
+
+def test_where_only_purge_pages_through_matches():
+    docs = {f"x{i}": "x.md" for i in range(5)}
+    docs["keep"] = "y.md"
+    collection = setup_collection(docs)
+    batch_size = app.DELETE_BATCH_SIZE
+    app.DELETE_BATCH_SIZE = 2
+    try:
+        deleted, missing, skipped = app.run_bulk_delete(None, {"source": "x.md"})
+    finally:
+        app.DELETE_BATCH_SIZE = batch_size
+    assert (deleted, missing, skipped) == (5, 0, 0)
+    assert collection.delete_batches == [2, 2, 1]
+    assert remaining(collection) == ["keep"]
+
+
+def test_ids_are_checked_in_batches():
+    collection = setup_collection({f"d{i}": "x.md" for i in range(5)})
+    batch_size = app.DELETE_BATCH_SIZE
+    app.DELETE_BATCH_SIZE = 2
+    try:
+        job = {}
+        app.run_bulk_delete([f"d{i}" for i in range(5)] + ["nope"], None, job=job)
+    finally:
+        app.DELETE_BATCH_SIZE = batch_size
+    assert collection.delete_batches == [2, 2, 1]
+    assert job == {"status": "running", "total": 6, "deleted": 5, "missing": 1, "skipped": 0}
+
+
+def test_endpoint_rejects_bad_requests():
+    collection = setup_collection({"a": "x.md"})
+    client = TestClient(app.app)
+    for body in [
+        {},
+        {"ids": []},
+        {"ids": ["a", " "]},
+        {"where": {"source": {"$nope": "x.md"}}},
+        {"ids": ["a"], "where": {"$and": "x.md"}, "background": True},
+    ]:
+        response = client.post("/delete/bulk", json=body)
+        assert response.status_code == 400, (body, response.text)
+    assert remaining(collection) == ["a"]
+    assert app.delete_jobs == {}
+
+
+def test_background_job_runs_to_completion():
+    collection = setup_collection({"a": "x.md", "b": "x.md", "c": "y.md"})
+    client = TestClient(app.app)
+    response = client.post("/delete/bulk", json={"ids": ["a", "b", "c", "nope"], "where": {"source": "x.md"}, "background": True})
+    assert response.status_code == 202
+    job = client.get(response.json()["status_url"]).json()
+    assert job["status"] == "completed" and job["finished_at"] is not None
+    assert (job["total"], job["deleted"], job["missing"], job["skipped"]) == (4, 2, 1, 1)
+    assert remaining(collection) == ["c"]
+
+    # The endpoint returns a snapshot, not the job dict the task is updating
+    snapshot = app.get_delete_job(job["id"])
+    assert snapshot == app.delete_jobs[job["id"]] and snapshot is not app.delete_jobs[job["id"]]
+
+    # Finished jobs expire after DELETE_JOB_TTL
+    app.delete_jobs[job["id"]]["finished_at"] -= app.DELETE_JOB_TTL + 1
+    assert client.get(response.json()["status_url"]).status_code == 404
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -29,11 +29,19 @@ def test_ollama():
         return False
 
 def test_chromadb():
-    """Test ChromaDB connection."""
+    """Test ChromaDB connection (a local `chroma run` server when CHROMA_MODE=http)."""
     print("\nTesting ChromaDB connection...")
     try:
         import chromadb
-        client = chromadb.PersistentClient(path="./db")
+        if os.getenv("CHROMA_MODE", "persistent").lower() == "http":
+            host = os.getenv("CHROMA_HOST", "localhost")
+            port = int(os.getenv("CHROMA_PORT", "8000"))
+            print(f"  Using Chroma server: {host}:{port}")
+            from chroma_client import create_http_client, with_retry
+            client = create_http_client(host, port)
+            print(f"  ✓ Heartbeat: {with_retry(client.heartbeat)}")
+        else:
+            client = chromadb.PersistentClient(path="./db")
         collection = client.get_or_create_collection("docs")
         count = collection.count()
         print(f"  ✓ ChromaDB connection successful")
@@ -45,6 +53,85 @@ def test_chromadb():
         traceback.print_exc()
         return False
 
+def test_chroma_retry():
+    """Test retry with backoff for unreachable and flaky Chroma servers."""
+    print("\nTesting ChromaDB retry/backoff...")
+    try:
+        import socket
+        import time
+        import httpx
+        import chroma_client
+        
+        # A port with nothing listening on it
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        expected_wait = sum(
+            chroma_client.CHROMA_RETRY_BACKOFF * 2 ** attempt
+            for attempt in range(chroma_client.CHROMA_MAX_RETRIES)
+        )
+        start = time.monotonic()
+        try:
+            chroma_client.create_http_client("127.0.0.1", port)
+            print(f"  ✗ Connected to unused port {port}")
+            return False
+        except httpx.ConnectError:
+            elapsed = time.monotonic() - start
+        if elapsed < expected_wait:
+            print(f"  ✗ Gave up after {elapsed:.2f}s, expected at least {expected_wait:.2f}s of backoff")
+            return False
+        print(f"  ✓ Unreachable server: gave up after {chroma_client.CHROMA_MAX_RETRIES} retries ({elapsed:.2f}s)")
+        
+        # A transient failure is retried until the call succeeds
+        attempts = []
+        def flaky():
+            attempts.append(1)
+            if len(attempts) <= min(2, chroma_client.CHROMA_MAX_RETRIES):
+                raise httpx.ConnectError("connection refused")
+            return "ok"
+        if chroma_client.with_retry(flaky) != "ok":
+            print("  ✗ Flaky call did not succeed after retries")
+            return False
+        print(f"  ✓ Flaky call succeeded after {len(attempts)} attempts")
+        return True
+    except Exception as e:
+        print(f"  ✗ Retry test failed: {type(e).__name__}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_read_replica():
+    """Test that /query reads go to CHROMA_READ_HOST (a second local `chroma run` server)."""
+    print("\nTesting read replica routing...")
+    if os.getenv("CHROMA_MODE", "persistent").lower() != "http" or not os.getenv("CHROMA_READ_HOST"):
+        print("  ⚠ Skipped: set CHROMA_MODE=http and CHROMA_READ_HOST to test read routing")
+        return True
+    try:
+        import uuid
+        import app
+        from chroma_client import create_http_client
+        
+        # Write a sentinel straight to the read host; only read_collection should see it
+        replica = create_http_client(app.CHROMA_READ_HOST, app.CHROMA_READ_PORT).get_collection(app.CHROMA_COLLECTION_NAME)
+        sentinel = f"read-replica-check-{uuid.uuid4()}"
+        replica.upsert(ids=[sentinel], documents=["Read replica routing check."])
+        try:
+            seen_by_reads = app.read_collection.get(ids=[sentinel], include=[])["ids"]
+            seen_by_writes = app.collection.get(ids=[sentinel], include=[])["ids"]
+        finally:
+            replica.delete(ids=[sentinel])
+        
+        if seen_by_reads != [sentinel] or seen_by_writes:
+            print(f"  ✗ read_collection is not using {app.CHROMA_READ_HOST}:{app.CHROMA_READ_PORT}")
+            return False
+        print(f"  ✓ Queries use {app.CHROMA_READ_HOST}:{app.CHROMA_READ_PORT}, writes use {app.CHROMA_HOST}:{app.CHROMA_PORT}")
+        return True
+    except Exception as e:
+        print(f"  ✗ Read replica test failed: {type(e).__name__}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_app():
     """Test the app endpoints."""
     print("\nTesting app endpoints...")
@@ -85,16 +172,20 @@ if __name__ == "__main__":
     
     ollama_ok = test_ollama()
     chroma_ok = test_chromadb()
+    retry_ok = test_chroma_retry()
+    replica_ok = test_read_replica()
     app_ok = test_app()
     
     print("\n" + "=" * 60)
     print("Summary:")
     print(f"  Ollama:  {'✓ OK' if ollama_ok else '✗ FAILED'}")
     print(f"  ChromaDB: {'✓ OK' if chroma_ok else '✗ FAILED'}")
+    print(f"  Retry:   {'✓ OK' if retry_ok else '✗ FAILED'}")
+    print(f"  Replica: {'✓ OK' if replica_ok else '✗ FAILED'}")
     print(f"  App:     {'✓ OK' if app_ok else '✗ FAILED'}")
     print("=" * 60)
     
-    if all([ollama_ok, chroma_ok, app_ok]):
+    if all([ollama_ok, chroma_ok, retry_ok, replica_ok, app_ok]):
         print("\n✓ All tests passed!")
         sys.exit(0)
     else:
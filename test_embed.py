@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Tests for incremental sync in embed.py, using an in-memory fake collection."""
+import os
+import sys
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import embed
+
+
+class FakeCollection:
+    """Stores upserted chunks in a dict and records every call."""
+
+    def __init__(self):
+        self.docs = {}
+        self.metadatas = {}
+        self.upserted = []
+        self.fail_upsert = False
+        self.fail_after_upserts = None  # Fail every upsert call after this many
+
+    def upsert(self, ids, documents, metadatas):
+        if self.fail_after_upserts is not None:
+            if self.fail_after_upserts == 0:
+                raise ConnectionError("connection refused")
+            self.fail_after_upserts -= 1
+        if self.fail_upsert:
+            raise ConnectionError("connection refused")
+        self.upserted.extend(ids)
+        for doc_id, doc, meta in zip(ids, documents, metadatas):
+            self.docs[doc_id] = doc
+            self.metadatas[doc_id] = meta
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+            self.metadatas.pop(doc_id, None)
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def paragraphs(count, prefix="Paragraph"):
+    return "\n\n".join(f"{prefix} {i}: " + "lorem ipsum " * 10 for i in range(count))
+
+
+def setup_sync(tmp):
+    root = os.path.join(tmp, "docs")
+    os.makedirs(root)
+    manifest = embed.Manifest.for_root(os.path.join(tmp, "db"), "docs", root)
+    return root, FakeCollection(), manifest
+
+
+def test_chunk_edit_only_changes_its_chunk():
+    """Growing an early paragraph must not shift the chunks after it."""
+    text = paragraphs(40)
+    before = embed.chunk_ids_for("src", embed.chunk_text(text))
+    parts = text.split("\n\n")
+    parts[1] += " extra" * 50
+    after = embed.chunk_ids_for("src", embed.chunk_text("\n\n".join(parts)))
+    assert len(set(after) - set(before)) == 1
+    assert len(set(before) - set(after)) == 1
+
+
+def test_chunk_long_paragraph_is_split():
+    text = "\n".join("line " * 50 for _ in range(10))
+    chunks = embed.chunk_text(text, chunk_size=600)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 600 for chunk in chunks)
+    assert all(len(chunk) <= 100 for chunk in embed.chunk_text("x" * 350, chunk_size=100))
+
+
+def test_chunk_merges_markdown_headings_into_next_paragraph():
+    body = "Some explanatory text that is long enough to stand on its own as a chunk. " * 2
+    text = (
+        "# Project\n\n" + body + "\n\n"
+        "## Installation\n\nRun the following:\n\n" + body + "\n\n"
+        "## Usage\n\n" + body
+    )
+    chunks = embed.chunk_text(text)
+    assert len(chunks) == 3
+    assert chunks[0].startswith("# Project\n\n")
+    assert chunks[1].startswith("## Installation\n\nRun the following:\n\n")
+    assert chunks[2].startswith("## Usage\n\n")
+    assert all(len(chunk) >= embed.MIN_CHUNK_SIZE for chunk in chunks)
+
+    # Editing one section leaves the other sections' chunks alone
+    edited = embed.chunk_text(text.replace("## Installation", "## Install"))
+    assert len(set(edited) - set(chunks)) == 1
+
+
+def test_chunk_ids_are_unique_for_duplicate_chunks():
+    ids = embed.chunk_ids_for("src", ["same", "same", "other"])
+    assert len(set(ids)) == 3
+    assert embed.chunk_ids_for("src", ["same"])[0] == ids[0]
+
+
+def test_sync_add_touch_change_remove():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, collection, manifest = setup_sync(tmp)
+        write(os.path.join(root, "a.txt"), paragraphs(3))
+        write(os.path.join(root, "sub", "b.md"), "hello")
+
+        stats = embed.sync_directory(root, collection, manifest)
+        assert stats["added"] == 2 and stats["chunks_embedded"] == 4
+        sources = {meta["source"] for meta in collection.metadatas.values()}
+        assert sources == {f"{embed.root_id(root)}/a.txt", f"{embed.root_id(root)}/sub/b.md"}
+
+        # Reloading the manifest from disk finds nothing to do
+        manifest = embed.Manifest.for_root(os.path.join(tmp, "db"), "docs", root)
+        stats = embed.sync_directory(root, collection, manifest)
+        assert stats["unchanged"] == 2 and stats["chunks_embedded"] == 0
+
+        # Touch without editing: re-hashed but not re-embedded
+        os.utime(os.path.join(root, "a.txt"), ns=(1, 1))
+        stats = embed.sync_directory(root, collection, manifest)
+        assert stats["unchanged"] == 2 and stats["chunks_embedded"] == 0
+        assert manifest.files["a.txt"]["mtime_ns"] == 1
+
+        # Edit one paragraph in the middle of a file, and remove the other file
+        parts = paragraphs(3).split("\n\n")
+        parts[1] = "Edited middle paragraph. " * 5
+        write(os.path.join(root, "a.txt"), "\n\n".join(parts))
+        os.remove(os.path.join(root, "sub", "b.md"))
+        collection.upserted.clear()
+        stats = embed.sync_directory(root, collection, manifest)
+        assert stats["changed"] == 1 and stats["removed"] == 1
+        assert stats["chunks_embedded"] == 1 and stats["chunks_deleted"] == 2
+        assert [collection.docs[i] for i in collection.upserted] == [parts[1].strip()]
+        assert sorted(collection.docs.values()) == sorted(p.strip() for p in parts)
+        assert set(manifest.files) == {"a.txt"}
+
+
+def test_sync_separate_roots_do_not_interfere():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "db")
+        collection = FakeCollection()
+        root_a, root_b = os.path.join(tmp, "a"), os.path.join(tmp, "b")
+        write(os.path.join(root_a, "same.md"), "from a")
+        write(os.path.join(root_b, "same.md"), "from b")
+
+        embed.sync_directory(root_a, collection, embed.Manifest.for_root(db_path, "docs", root_a))
+        stats = embed.sync_directory(root_b, collection, embed.Manifest.for_root(db_path, "docs", root_b))
+        assert stats["removed"] == 0 and stats["chunks_deleted"] == 0
+        assert sorted(collection.docs.values()) == ["from a", "from b"]
+
+
+def test_manifest_rejects_other_root():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, collection, manifest = setup_sync(tmp)
+        write(os.path.join(root, "a.txt"), "text")
+        embed.sync_directory(root, collection, manifest)
+        try:
+            embed.Manifest(manifest.path, os.path.join(tmp, "elsewhere"))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Manifest loaded for a different root")
+
+
+def test_sync_failure_leaves_manifest_unchanged():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, collection, manifest = setup_sync(tmp)
+        write(os.path.join(root, "a.txt"), "text")
+        collection.fail_upsert = True
+        try:
+            embed.sync_directory(root, collection, manifest)
+        except ConnectionError:
+            pass
+        assert manifest.files == {}
+        assert not os.path.exists(manifest.path)
+
+        # The next sync retries the file
+        collection.fail_upsert = False
+        stats = embed.sync_directory(root, collection, manifest)
+        assert stats["added"] == 1 and list(collection.docs.values()) == ["text"]
+
+
+def test_sync_partial_failure_keeps_committed_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, collection, manifest = setup_sync(tmp)
+        for i in range(5):
+            write(os.path.join(root, f"f{i}.txt"), f"file {i}")
+        batch_size = embed.BATCH_SIZE
+        embed.BATCH_SIZE = 2
+        try:
+            collection.fail_after_upserts = 1
+            try:
+                embed.sync_directory(root, collection, manifest)
+            except ConnectionError:
+                pass
+            reloaded = embed.Manifest.for_root(os.path.join(tmp, "db"), "docs", root)
+            assert len(reloaded.files) == 2
+
+            # Resuming only embeds the files that weren't written
+            collection.fail_after_upserts = None
+            collection.upserted.clear()
+            stats = embed.sync_directory(root, collection, reloaded)
+            assert stats["added"] == 3 and len(collection.upserted) == 3
+            assert len(collection.docs) == 5
+        finally:
+            embed.BATCH_SIZE = batch_size
+
+
+def test_watch_rejects_missing_directory_and_bad_intervals():
+    with tempfile.TemporaryDirectory() as tmp:
+        missing = os.path.join(tmp, "missing")
+        manifest = embed.Manifest.for_root(os.path.join(tmp, "db"), "docs", missing)
+        try:
+            embed.watch_directory(missing, FakeCollection(), manifest)
+        except NotADirectoryError:
+            pass
+        else:
+            raise AssertionError("watch_directory accepted a missing directory")
+    for flag in ("--interval", "--debounce"):
+        for value in ("0", "-1"):
+            try:
+                embed._parse_args(["docs", "--watch", flag, value])
+            except SystemExit:
+                pass
+            else:
+                raise AssertionError(f"{flag} {value} was accepted")
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -13,6 +13,7 @@ except ImportError:
     sys.exit(1)
 
 import json
+import time
 
 API_BASE_URL = os.getenv("API_URL", "http://localhost:8000")
 
@@ -135,6 +136,99 @@ def test_delete_endpoint(doc_id):
         print(f"✗ DELETE endpoint failed: {e}")
         return False
 
+def test_bulk_delete_endpoint():
+    """Test the bulk DELETE endpoint."""
+    print("\n" + "=" * 60)
+    print("Testing Bulk DELETE Endpoint")
+    print("=" * 60)
+    
+    try:
+        # Add a few documents to delete
+        doc_ids = []
+        for i in range(3):
+            response = requests.post(
+                f"{API_BASE_URL}/add",
+                json={"text": f"Bulk delete test document number {i}."},
+                timeout=10
+            )
+            if response.status_code != 201:
+                print("⚠ Could not add test documents, skipping bulk delete test")
+                return False
+            doc_ids.append(response.json()["id"])
+        
+        # Delete them along with an ID that doesn't exist
+        fake_id = "00000000-0000-0000-0000-000000000000"
+        response = requests.post(
+            f"{API_BASE_URL}/delete/bulk",
+            json={"ids": doc_ids + [fake_id]},
+            timeout=10
+        )
+        if response.status_code != 200:
+            print(f"✗ Bulk DELETE failed: Expected 200, got {response.status_code}")
+            print(f"  Response: {response.text[:200]}")
+            return False
+        data = response.json()
+        if data.get("deleted") != len(doc_ids) or data.get("missing") != 1 or data.get("skipped") != 0:
+            print(f"✗ Bulk DELETE failed: Expected {len(doc_ids)} deleted and 1 missing")
+            print(f"  Response: {data}")
+            return False
+        print(f"✓ Bulk DELETE endpoint passed")
+        print(f"  {data.get('message')}")
+        
+        # Test background mode and poll the job until it finishes
+        response = requests.post(
+            f"{API_BASE_URL}/add",
+            json={"text": "Background bulk delete test document."},
+            timeout=10
+        )
+        if response.status_code != 201:
+            print("⚠ Could not add test document, skipping background bulk delete test")
+            return False
+        background_id = response.json()["id"]
+        response = requests.post(
+            f"{API_BASE_URL}/delete/bulk",
+            json={"ids": [background_id, fake_id], "background": True},
+            timeout=10
+        )
+        if response.status_code != 202 or "job_id" not in response.json():
+            print(f"✗ Background bulk DELETE failed: Expected 202 with a job_id, got {response.status_code}")
+            print(f"  Response: {response.text[:200]}")
+            return False
+        status_url = f"{API_BASE_URL}{response.json()['status_url']}"
+        for _ in range(50):
+            job = requests.get(status_url, timeout=10).json()
+            if job.get("status") in ("completed", "failed"):
+                break
+            time.sleep(0.2)
+        if job.get("status") != "completed" or job.get("total") != 2 or job.get("deleted") != 1 or job.get("missing") != 1:
+            print(f"✗ Background bulk DELETE failed: Expected a completed job with 2 total, 1 deleted and 1 missing")
+            print(f"  Job: {job}")
+            return False
+        print(f"✓ Background bulk DELETE completed (deleted: {job['deleted']}, missing: {job['missing']})")
+        
+        # Invalid requests are rejected before anything is deleted
+        for body, label in [
+            ({"where": {"source": {"$nope": "x"}}}, "Malformed filter"),
+            ({"ids": ["", "  "]}, "Blank IDs"),
+        ]:
+            response = requests.post(f"{API_BASE_URL}/delete/bulk", json=body, timeout=10)
+            if response.status_code != 400:
+                print(f"✗ {label}: Expected 400, got {response.status_code}")
+                print(f"  Response: {response.text[:200]}")
+                return False
+            print(f"✓ {label}: Rejected with 400")
+        
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"✗ Bulk DELETE endpoint failed: {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"  Status: {e.response.status_code}")
+            print(f"  Response: {e.response.text[:200]}")
+        return False
+    except Exception as e:
+        print(f"✗ Bulk DELETE endpoint failed: {e}")
+        return False
+
 def test_error_messages():
     """Test improved error messages."""
     print("\n" + "=" * 60)
@@ -266,6 +360,7 @@ if __name__ == "__main__":
     results['env_vars'] = test_environment_variables()
     results['add'], doc_id = test_add_endpoint()
     results['delete'] = test_delete_endpoint(doc_id)
+    results['bulk_delete'] = test_bulk_delete_endpoint()
     results['error_messages'] = test_error_messages()
     results['query'] = test_query_endpoint()
     